@@ -3,23 +3,29 @@ class AudioOutput:
     Output abstraction - wraps all methods of sound card required to work.
     """
     def __init__(self, config, device_index, buffer_size):
-        # Import pyaudio only if really needed.
-        # pylint: disable=import-outside-toplevel
-        import pyaudio
-
         self.stream = None
         self.pyaudio = None
         self.config = config
 
-        # Generate silence frames (zeroed) of appropriate sizes for chunks
-        self.silence_cache = None
+        # Pre-generate silence frames (zeroed) once. Batches of 1, 2, 4 and
+        # 8 chunks let the player insert accumulated silence with few
+        # writes and no per-insertion allocation.
+        self.silence_cache = b'\x00' * config.chunk_size
+        self.silence_batch = {n: self.silence_cache * n for n in (1, 2, 4, 8)}
 
-        self.chunk_frames = config.chunk_size / config.frame_size
+        # Integer, so the buffer-space comparison on the hot path doesn't
+        # coerce to float. The chunk_size setter guarantees divisibility.
+        assert config.chunk_size % config.frame_size == 0
+        self.chunk_frames = config.chunk_size // config.frame_size
 
         if device_index == -1:
             # We are tested. Don't open stream (stop at calculation of chunk_frames).
             return
 
+        # Import pyaudio only if really needed.
+        # pylint: disable=import-outside-toplevel
+        import pyaudio
+
         assert self.stream is None
         self.pyaudio = pyaudio.PyAudio()
 
@@ -62,10 +68,5 @@ class AudioOutput:
         return self.stream.write(data)
 
     def get_silent_chunk(self):
-        "Generate and cache silent chunks"
-        if self.silence_cache is not None:
-            return self.silence_cache
-
-        silent_chunk = b'\x00' * self.config.chunk_size
-        self.silence_cache = silent_chunk
-        return silent_chunk
+        "Return the pre-generated silent chunk"
+        return self.silence_cache
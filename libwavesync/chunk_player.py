@@ -1,10 +1,50 @@
 import asyncio
+import logging
 import random
+from concurrent.futures import ThreadPoolExecutor
 from libwavesync import (
     time_machine,
     AudioOutput
 )
 
+log = logging.getLogger("wavesync.player")
+
+# Action codes of the timing decision
+_PLAY, _DROP, _RECOVER, _WAIT = range(4)
+
+
+def _wake_up(fut):
+    "Timer callback of the absolute-deadline wait"
+    if not fut.cancelled():
+        fut.set_result(None)
+
+
+def _decide(delay, mid_tolerance_s, max_delay, one_ms, rnd_q16, inv_mid_tolerance_q16):
+    """
+    Classify an off-schedule chunk - returns (action, time to wait).
+
+    Pure scalar arithmetic on purpose: no object access, so the function
+    could be compiled (cython/numba) without touching the I/O around it.
+    The drop probability is compared in Q16 fixed point against a 16-bit
+    random value - ample precision for a drop decision.
+    """
+    if delay < -mid_tolerance_s:
+        # Probabilistic drop of lagging chunks to get back on track.
+        # Probability of drop is higher, the more chunk lags behind
+        # current time. Similar to the RED algorithm in TCP congestion.
+        over = -delay - mid_tolerance_s
+        if rnd_q16 < int(over * inv_mid_tolerance_q16):
+            return _DROP, 0.0
+        return _PLAY, 0.0
+
+    if delay > max_delay:
+        # Probably we hanged for so long time that the time recovering
+        # mechanism rolled over. Recover
+        return _RECOVER, 0.0
+
+    # Chunk is in the future - wait until it's within the tolerance
+    return _WAIT, max(one_ms, delay - one_ms)
+
 
 class ChunkPlayer:
     "Play received audio and keep sync"
@@ -29,9 +69,31 @@ class ChunkPlayer:
         # Number of silent frames that need to be inserted to get in sync
         self.silence_to_insert = 0
 
+        # Private PRNG for probabilistic chunk dropping - no contention on
+        # the module-level shared instance.
+        self._rng = random.Random()
+
+        # Counter sampling the drop-chunk debug message
+        self._drop_count = 0
+
         # Used to quit main loop
         self.stop = False
 
+        # Event loop, cached when the stream is opened
+        self._loop = None
+
+        # Background task owning all output writes and its feed queue
+        self._write_queue = None
+        self._writer_task = None
+
+        # Single-threaded executor serializing the stream writes - the
+        # PyAudio stream is not thread-safe, so a timed-out write must
+        # queue up new writes behind it instead of racing them.
+        self._write_executor = None
+
+        # Playback coroutine specialized for the current configuration
+        self._play_chunk = None
+
         # Calculated sizes
         self.frame_size = None
 
@@ -39,23 +101,27 @@ class ChunkPlayer:
         "Clear player queue"
         self.silence_to_insert = 0
 
-        # Clear the chunk list, but preserve CFG commands
-        cfg = None
-        for cmd, item in self.chunk_queue.chunk_list:
-            if cmd == self.chunk_queue.CMD_CFG:
-                cfg = item
-                break
+        # Flush chunks already queued for the output
+        if self._write_queue is not None:
+            while not self._write_queue.empty():
+                self._write_queue.get_nowait()
+
+        # Clear the chunk queue, but preserve a pending CFG command. The
+        # queue tracks it, so no scan over the queued chunks is needed.
+        queue = self.chunk_queue
+        cfg = queue.current_cfg
 
-        self.chunk_queue.chunk_list.clear()
+        queue.cmd_list.clear()
+        queue.item_list.clear()
         if cfg is not None:
-            self.chunk_queue.chunk_list.append((self.chunk_queue.CMD_CFG, cfg))
+            queue.append(queue.CMD_CFG, cfg)
 
         self.chunk_queue.do_recovery()
 
     def _handle_cmd_drops(self, item):
         "Handle drops-detected command"
         if item > 200:
-            print("Recovering after a huge packet loss of %d packets" % item)
+            log.info("Recovering after a huge packet loss of %d packets", item)
             self.clear_state()
         else:
             # Just slowly resync
@@ -63,19 +129,52 @@ class ChunkPlayer:
 
     def _handle_cmd_cfg(self, audio_config):
         "Handle configuration command"
-        print("Got new configuration - opening audio stream")
+        log.info("Got new configuration - opening audio stream")
         self.clear_state()
+        self._loop = asyncio.get_event_loop()
         del self.audio_output
         self.audio_output = AudioOutput(audio_config, self.device_index, self.buffer_size)
         # Calculate maximum sensible delay in given configuration
         self.max_delay = (2000 + self.audio_output.config.sink_latency_ms +
                           self.audio_output.config.latency_ms) / 1000
-        print("Assuming maximum chunk delay of %.2fms in this setup" % (self.max_delay * 1000))
+        log.info("Assuming maximum chunk delay of %.2fms in this setup",
+                 self.max_delay * 1000)
+
+        # Restart the writer task - it owns all stream writes, so the
+        # timing logic never blocks on PortAudio directly.
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        if self._write_executor is None:
+            self._write_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="wavesync-write")
+        self._write_queue = asyncio.Queue(maxsize=8)
+        self._writer_task = self._loop.create_task(self._writer_loop())
+
+        # Specialize the playback coroutine for the new configuration
+        self._play_chunk = self._build_play_chunk()
+
+    async def _writer_loop(self):
+        "Pump queued chunks into the output stream"
+        while True:
+            chunk = await self._write_queue.get()
+
+            # PyAudio write blocks inside PortAudio C code with the GIL
+            # released - run it on the write thread to keep the loop
+            # running. On timeout the write itself is not abandoned (the
+            # thread can't be interrupted); the single worker makes any
+            # follow-up write wait for it instead of racing it.
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._loop.run_in_executor(
+                        self._write_executor, self.audio_output.write, chunk)),
+                    timeout=self.max_delay + 1)
+            except asyncio.TimeoutError:
+                log.warning("Hey, the output is STUCK!")
 
     async def _handle_empty_queue(self):
         "Handle case with the empty input queue"
         if self.audio_output is not None:
-            print("Queue empty - waiting")
+            log.info("Queue empty - waiting")
 
         self.chunk_queue.chunk_available.clear()
         # FIXME: This blocks. But instead we should be pumping data into output buffer.
@@ -83,85 +182,174 @@ class ChunkPlayer:
 
         if self.audio_output is not None:
             await asyncio.sleep(self.audio_output.config.latency_ms / 1000 / 4)
-            print("Got stream flowing. q_len=%d" % len(self.chunk_queue.chunk_list))
-
-    async def _handle_cmd_audio(self, item):
-        "Handle chunk playback"
-        mid_tolerance_s = self.tolerance_ms / 2 / 1000
+            log.info("Got stream flowing. q_len=%d", len(self.chunk_queue))
+
+    def _build_play_chunk(self):
+        """
+        Build the playback coroutine specialized for current configuration.
+
+        All values that change only on CMD_CFG - and the hot output/clock
+        methods - are captured as closure variables, read with cheap
+        LOAD_DEREFs instead of chains of attribute lookups on every chunk.
+        _handle_cmd_cfg() rebuilds the closure whenever they change.
+        """
+        # Per-configuration constants
+        sink_latency_s = self.audio_output.config.sink_latency_s
+        tolerance_ms = self.tolerance_ms
+        mid_tolerance_s = tolerance_ms / 2 / 1000
         one_ms = 1/1000.0
-
-        mark, chunk = item
-        desired_time = mark - self.audio_output.config.sink_latency_s
-
-        # 0) We got the next chunk to be played
-        now = time_machine.now()
-
-        # Negative when we're lagging behind.
-        delay = desired_time - now
-
-        self.stats.total_delay += delay
-        self.stats.total_chunks += 1
-
-        # Probabilistic drop of lagging chunks to get back on track.
-        # Probability of drop is higher, the more chunk lags behind current
-        # time. Similar to the RED algorithm in TCP congestion.
-        if delay < -mid_tolerance_s:
-            over = -delay - mid_tolerance_s
-            prob = over / mid_tolerance_s
-            if random.random() < prob:
-                s = "Drop chunk: q_len=%2d delay=%.1fms < 0. tolerance=%.1fms: P=%.2f"
-                s = s % (len(self.chunk_queue.chunk_list),
-                         delay * 1000, self.tolerance_ms, prob)
-                print(s)
-                self.stats.time_drops += 1
-                return
-
-        elif delay > self.max_delay:
-            # Probably we hanged for so long time that the time recovering
-            # mechanism rolled over. Recover
-            print("Huge recovery - delay of %.2f exceeds the max delay of %.2f" % (
-                delay, self.max_delay))
-            self.clear_state()
-            return
-
-        # If chunk is in the future - wait until it's within the tolerance
-        elif delay > one_ms:
-            to_wait = max(one_ms, delay - one_ms)
-            await asyncio.sleep(to_wait)
-
-        # Wait until we can write chunk into output buffer. This might
-        # delay us too much - the probabilistic dropping mechanism will kick
-        # in.
-        times = 0
-        while True:
-            buffer_space = self.audio_output.get_write_available()
-            if buffer_space < self.audio_output.chunk_frames:
-                self.stats.output_delays += 1
-                await asyncio.sleep(one_ms)
-                times += 1
-                if times > 200:
-                    print("Hey, the output is STUCK!")
-                    await asyncio.sleep(1)
-                    break
-                continue
-            self.audio_output.write(chunk)
-            return
+        max_delay = self.max_delay
+        chunk_frames = self.audio_output.chunk_frames
+        silence_batch = self.audio_output.silence_batch
+
+        # Q16 reciprocal of the tolerance, for the fixed-point drop check
+        inv_mid_tolerance_q16 = 65536.0 / mid_tolerance_s
+
+        # Hot methods and objects
+        now = time_machine.now
+        getrandbits = self._rng.getrandbits
+        loop_time = self._loop.time
+        call_at = self._loop.call_at
+        create_future = self._loop.create_future
+        stats = self.stats
+        get_write_available = self.audio_output.get_write_available
+        write_queue = self._write_queue
+        cmd_audio = self.chunk_queue.CMD_AUDIO
+        cmd_list = self.chunk_queue.cmd_list
+        item_list = self.chunk_queue.item_list
+        cmd_popleft = cmd_list.popleft
+        item_popleft = item_list.popleft
+
+        async def play_chunk(item):
+            "Handle chunk playback"
+            mark, chunk = item
+            desired_time = mark - sink_latency_s
+
+            # 0) We got the next chunk to be played.
+            # Negative when we're lagging behind.
+            delay = desired_time - now()
+
+            stats.total_delay += delay
+            stats.total_chunks += 1
+
+            # Fast path: the common case of a chunk arriving in time goes
+            # straight to the write. Off-schedule chunks are classified by
+            # the arithmetic core and dispatched on its action code.
+            if not -mid_tolerance_s <= delay <= one_ms:
+                action, to_wait = _decide(delay, mid_tolerance_s,
+                                          max_delay, one_ms,
+                                          getrandbits(16),
+                                          inv_mid_tolerance_q16)
+
+                if action == _DROP:
+                    stats.time_drops += 1
+
+                    # Sample the message 1-in-16 - a heavy-loss regime
+                    # can drop hundreds of chunks per second and
+                    # logging each would itself lag the player.
+                    self._drop_count += 1
+                    if self._drop_count % 16 == 1 and log.isEnabledFor(logging.DEBUG):
+                        prob = (-delay - mid_tolerance_s) / mid_tolerance_s
+                        log.debug(f"Drop chunk: dropped={self._drop_count} "
+                                  f"q_len={len(self.chunk_queue):2d} "
+                                  f"delay={delay * 1000:.1f}ms < 0. "
+                                  f"tolerance={tolerance_ms:.1f}ms: P={prob:.2f}")
+                    return
+
+                if action == _RECOVER:
+                    log.warning("Huge recovery - delay of %.2f exceeds the max delay of %.2f",
+                                delay, max_delay)
+                    self.clear_state()
+                    return
+
+                if action == _WAIT:
+                    # Wait on an absolute deadline - a single timer
+                    # registration waking a bare future, instead of
+                    # asyncio.sleep's extra clock read and task wrapping.
+                    fut = create_future()
+                    call_at(loop_time() + to_wait, _wake_up, fut)
+                    await fut
+
+            # Catching up after a burst: drain directly following chunks
+            # that are also already due and submit them as one write, so
+            # the per-call PortAudio overhead is paid once. Chunks lagging
+            # beyond the tolerance are left to the drop ladder above.
+            if delay < -one_ms and cmd_list and cmd_list[0] == cmd_audio:
+                parts = [chunk]
+                while (len(parts) < 8
+                       and cmd_list and cmd_list[0] == cmd_audio):
+                    next_delay = item_list[0][0] - sink_latency_s - now()
+                    if not -mid_tolerance_s <= next_delay <= -one_ms:
+                        break
+                    cmd_popleft()
+                    parts.append(item_popleft()[1])
+                    stats.total_delay += next_delay
+                    stats.total_chunks += 1
+                    # Merged chunks skip the dispatch loop's stats.chunk()
+                    # call - count them here to keep ch/s and the STAT
+                    # cadence honest during catch-up bursts.
+                    stats.chunks += 1
+                if len(parts) > 1:
+                    chunk = b''.join(parts)
+
+            # Insert silence accumulated after small packet drops to get
+            # back in sync. Buffers are pre-generated - use the largest
+            # batch fitting the remaining count to limit the number of
+            # writes. One attribute read on the common (no silence) path.
+            remaining = self.silence_to_insert
+            if remaining:
+                self.silence_to_insert = 0
+                while remaining > 0:
+                    batch = 8
+                    while batch > remaining:
+                        batch //= 2
+                    await write_queue.put(silence_batch[batch])
+                    remaining -= batch
+
+            # Hand the chunk over to the writer task. If it delays us too
+            # much, the probabilistic dropping mechanism will kick in.
+            if get_write_available() < chunk_frames:
+                stats.output_delays += 1
+            try:
+                write_queue.put_nowait(chunk)
+            except asyncio.QueueFull:
+                # Writer can't keep up - wait for room; the lag this
+                # causes is recovered by dropping subsequent chunks.
+                await write_queue.put(chunk)
+
+        return play_chunk
 
     async def chunk_player(self):
         "Reads asynchronously chunks from the list and plays them"
 
+        # Hoist attribute lookups out of the per-chunk loop. The deques
+        # themselves are stable - clear_state() empties them in place.
+        cmd_list = self.chunk_queue.cmd_list
+        cmd_popleft = cmd_list.popleft
+        item_popleft = self.chunk_queue.item_list.popleft
+        cmd_cfg = self.chunk_queue.CMD_CFG
+        cmd_drops = self.chunk_queue.CMD_DROPS
+        stats_chunk = self.stats.chunk
+        play_chunk = self._play_chunk
+
         while not self.stop:
-            if not self.chunk_queue.chunk_list:
+            if not cmd_list:
                 await self._handle_empty_queue()
                 continue
 
-            cmd, item = self.chunk_queue.chunk_list.popleft()
+            cmd = cmd_popleft()
+            item = item_popleft()
 
-            if cmd == self.chunk_queue.CMD_CFG:
+            if cmd == cmd_cfg:
+                # Consumed - clear_state() must not replay it. A newer CFG
+                # may still be queued behind this one; forget only our own.
+                if item is self.chunk_queue.current_cfg:
+                    self.chunk_queue.current_cfg = None
                 self._handle_cmd_cfg(item)
+                play_chunk = self._play_chunk
                 continue
 
-            if cmd == self.chunk_queue.CMD_DROPS:
+            if cmd == cmd_drops:
                 self._handle_cmd_drops(item)
                 continue
 
@@ -171,9 +359,20 @@ class ChunkPlayer:
                 # No output, no playing.
                 continue
 
-            await self._handle_cmd_audio(item)
+            await play_chunk(item)
 
             # Main status line
-            self.stats.chunk(queue_length=len(self.chunk_queue.chunk_list))
+            stats_chunk(queue_length=len(cmd_list))
+
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+
+        if self._write_executor is not None:
+            self._write_executor.shutdown(wait=False)
+            self._write_executor = None
 
-        print("- Finishing chunk player")
+        log.info("- Finishing chunk player")
@@ -12,16 +12,33 @@ class ChunkQueue:
     def __init__(self):
         # NOTE: On LAN an unsorted deque works for me. Might need
         # a packet ordering based on time mark eventually.
-        self.chunk_list = deque()
+        # Kept as two parallel deques (commands and payloads) to avoid
+        # allocating a (cmd, item) tuple for every enqueued chunk.
+        self.cmd_list = deque()
+        self.item_list = deque()
 
         self.chunk_available = asyncio.Event()
 
+        # Last enqueued, not yet consumed, audio configuration. Lets the
+        # player preserve it in O(1) when flushing the queue.
+        self.current_cfg = None
+
         # When doing huge recovery - ignore few cached, out-of-date packets
         self.ignore_audio_packets = 0
 
         self.chunk_no = 0
         self.last_sender_chunk_no = None
 
+    def append(self, cmd, item):
+        "Enqueue a command with its payload"
+        if cmd == self.CMD_CFG:
+            self.current_cfg = item
+        self.cmd_list.append(cmd)
+        self.item_list.append(item)
+
+    def __len__(self):
+        return len(self.cmd_list)
+
     def init_queue(self):
         self.chunk_no = 0
         self.last_sender_chunk_no = None
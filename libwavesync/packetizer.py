@@ -8,7 +8,6 @@ import struct
 import zlib
 import ipaddress
 
-from datetime import datetime
 from time import time
 
 from libwavesync import time_machine
@@ -103,8 +102,8 @@ class Packetizer:
 
         # For local playback
         if self.chunk_queue is not None:
-            self.chunk_queue.chunk_list.append((self.chunk_queue.CMD_CFG,
-                                                self.audio_config))
+            self.chunk_queue.append(self.chunk_queue.CMD_CFG,
+                                    self.audio_config)
 
         while not self.stop:
             # Block until samples are read by the reader.
@@ -127,8 +126,7 @@ class Packetizer:
 
             if self.chunk_queue is not None:
                 item = (future_ts, chunk)
-                self.chunk_queue.chunk_list.append((self.chunk_queue.CMD_AUDIO,
-                                                    item))
+                self.chunk_queue.append(self.chunk_queue.CMD_AUDIO, item)
                 self.chunk_queue.chunk_available.set()
 
             chunk_len = len(chunk)
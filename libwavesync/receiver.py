@@ -92,7 +92,7 @@ class Receiver(asyncio.DatagramProtocol):
 
         if audio_config != self.audio_config:
             # If changed - sent further
-            q.chunk_list.append((q.CMD_CFG, audio_config))
+            q.append(q.CMD_CFG, audio_config)
             self.audio_config = audio_config
 
         # Handle dropped packets
@@ -116,19 +116,21 @@ class Receiver(asyncio.DatagramProtocol):
             print("WARNING: More pkts received than sent! "
                   "You are receiving multiple streams or duplicates.")
         elif dropped > 0:
-            q.chunk_list.append((q.CMD_DROPS, dropped))
+            q.append(q.CMD_DROPS, dropped)
             q.chunk_available.set()
 
     def datagram_received(self, data, addr):
         "Handle incoming datagram - audio chunk, or status packet"
         header = data[:2]
         mark = data[2:4]
-        chunk = data[4:]
         if header == Packetizer.HEADER_RAW_AUDIO:
-            pass
+            # Zero-copy view of the payload. PyAudio accepts any
+            # buffer-protocol object, so the audio data is never copied
+            # out of the datagram.
+            chunk = memoryview(data)[4:]
         elif header == Packetizer.HEADER_COMPRESSED_AUDIO:
             try:
-                chunk = zlib.decompress(chunk)
+                chunk = zlib.decompress(memoryview(data)[4:])
             except zlib.error:
                 print("WARNING: Invalid compressed data - dropping")
                 return
@@ -151,7 +153,7 @@ class Receiver(asyncio.DatagramProtocol):
         # Count received audio-chunks
         self.chunk_queue.chunk_no += 1
 
-        self.chunk_queue.chunk_list.append((self.chunk_queue.CMD_AUDIO, item))
+        self.chunk_queue.append(self.chunk_queue.CMD_AUDIO, item)
         self.chunk_queue.chunk_available.set()
 
     def error_received(self, exc):
@@ -1,5 +1,9 @@
+import logging
 from time import time
 
+log = logging.getLogger("wavesync.stats")
+
+
 class Stats:
     """
     Aggregate statistics from all components and display periodically
@@ -21,32 +25,27 @@ class Stats:
 
     def show(self, queue_length):
         "Display statistics"
-        took = time() - self.start
-        chunks_per_s = self.chunks / took
-
-        s = ("STAT: chunks: q_len=%-3d "
-             "ch/s=%5.1f "
-             "net lat: %-5.1fms "
-             "avg_delay=%-5.2f drops: time=%d net=%d out_delay=%d")
-
-        s = s % (
-            queue_length,
-            chunks_per_s,
-            1000.0 * self.network_latency,
-            1000.0 * self.total_delay/self.total_chunks,
-            self.time_drops,
-            self.network_drops,
-            self.output_delays,
-        )
-        print(s)
+        if log.isEnabledFor(logging.INFO):
+            took = time() - self.start
+            chunks_per_s = self.chunks / took
+            net_latency_ms = 1000.0 * self.network_latency
+            avg_delay = 1000.0 * self.total_delay / self.total_chunks
+
+            log.info(f"STAT: chunks: q_len={queue_length:<3d} "
+                     f"ch/s={chunks_per_s:5.1f} "
+                     f"net lat: {net_latency_ms:<5.1f}ms "
+                     f"avg_delay={avg_delay:<5.2f} "
+                     f"drops: time={self.time_drops} "
+                     f"net={self.network_drops} "
+                     f"out_delay={self.output_delays}")
 
         # Warnings
         if self.network_latency > 1:
-            print("WARNING: Your network latency seems HUGE. "
-                  "Are the clocks synchronised?")
+            log.warning("Your network latency seems HUGE. "
+                        "Are the clocks synchronised?")
         elif self.network_latency <= -0.05:
-            print("WARNING: You either exceeded the speed of "
-                  "light or have unsynchronised clocks")
+            log.warning("You either exceeded the speed of "
+                        "light or have unsynchronised clocks")
 
     def chunk(self, queue_length):
         """
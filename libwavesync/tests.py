@@ -1,7 +1,6 @@
 import sys
 import asyncio
 import unittest
-from datetime import datetime
 from unittest.mock import Mock, MagicMock
 
 from . import (
@@ -11,6 +10,7 @@ from . import (
     ChunkQueue,
     SampleReader,
     Receiver,
+    Stats,
     cli_args,
 )
 
@@ -59,24 +59,22 @@ def mock_chunk_player():
     "Mock chunk player"
     chunk_queue = ChunkQueue()
     player = ChunkPlayer(chunk_queue,
-                         receiver=None,
+                         stats=Stats(),
                          tolerance_ms=30,
                          buffer_size=8192,
                          # Mock output device
                          device_index=-1)
 
-    # Mock output
-    player._close_stream = Mock()
-    original_open_stream = player._open_stream
-    def open_stream():
-        original_open_stream()
+    # Mock the output stream which gets opened on a CFG command
+    original_handle_cmd_cfg = player._handle_cmd_cfg
+    def handle_cmd_cfg(audio_config):
+        original_handle_cmd_cfg(audio_config)
 
-        # Open stream after _open_stream is called
-        player.stream = Mock()
-        player.stream.get_write_available = Mock(return_value=300)
-        player.stream.write = Mock()
+        player.audio_output.stream = Mock()
+        player.audio_output.stream.get_write_available = Mock(return_value=300)
+        player.audio_output.stream.write = Mock()
 
-    player._open_stream = open_stream
+    player._handle_cmd_cfg = handle_cmd_cfg
     return chunk_queue, player
 
 
@@ -155,7 +153,8 @@ def mock_txrx():
 
     rx_receiver = Receiver(rx_chunk_queue,
                            channel=channel,
-                           sink_latency_ms=0)
+                           sink_latency_ms=0,
+                           stats=Stats())
 
     # Combine TX-RX
     rx_receiver.connection_made(MagicMock())
@@ -179,11 +178,11 @@ def mock_txrx():
     loop.run_until_complete(tasks)
 
     # Both played
-    tx_player.stream.write.assert_called()
-    rx_player.stream.write.assert_called()
+    tx_player.audio_output.stream.write.assert_called()
+    rx_player.audio_output.stream.write.assert_called()
 
-    assert rx_player.stream.write.call_count > 50
-    assert tx_player.stream.write.call_count > 50
+    assert rx_player.audio_output.stream.write.call_count > 50
+    assert tx_player.audio_output.stream.write.call_count > 50
 
 
 class WaveSyncTestCase(unittest.TestCase):
@@ -227,6 +226,37 @@ class WaveSyncTestCase(unittest.TestCase):
         "Test TX-RX pipeline"
         mock_txrx()
 
+    def test_queued_cfg_survives_clear(self):
+        "Handling one CFG must not wipe another CFG queued behind it"
+        chunk_queue, player = mock_chunk_player()
+
+        def make_cfg(rate):
+            cfg = AudioConfig(rate=rate,
+                              sample=16,
+                              channels=2,
+                              latency_ms=200,
+                              sink_latency_ms=0)
+            cfg.chunk_size = 1000
+            return cfg
+
+        # Config flapped between status packets - two CFGs queued at once
+        chunk_queue.append(chunk_queue.CMD_CFG, make_cfg(44100))
+        chunk_queue.append(chunk_queue.CMD_CFG, make_cfg(48000))
+        chunk_queue.chunk_available.set()
+
+        async def stop_when_drained():
+            while chunk_queue.cmd_list:
+                await asyncio.sleep(0.01)
+            player.stop = True
+            chunk_queue.chunk_available.set()
+
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(asyncio.gather(player.chunk_player(),
+                                               stop_when_drained()))
+
+        # The player must end up on the latest configuration
+        self.assertEqual(player.audio_output.config.rate, 48000)
+
     def test_arguments(self):
         "Test program argument parsing"
         with unittest.mock.patch.object(sys, 'argv', ['prog', '--rx']):
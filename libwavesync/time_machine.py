@@ -52,5 +52,11 @@ def to_absolute_timestamp(relative_ts, mark):
 
 
 def now():
-    "Current UTC timestamp"
+    """
+    Current UTC timestamp.
+
+    time.time() is deliberate: timemarks must be comparable between
+    sender and receiver hosts, so a host-local monotonic clock won't do.
+    It's also much cheaper than constructing datetime objects per chunk.
+    """
     return time.time()